@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import os
 import re
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import Any, Optional
 
 from .task_types import ActionItem
@@ -25,6 +30,11 @@ except Exception as exc:  # pragma: no cover - runtime fallback
     pipeline = None  # type: ignore[assignment]
     logger.warning("Transformers text-generation stack unavailable: %s", exc)
 
+try:  # pragma: no cover - optional dependency guard
+    import torch
+except Exception:  # pragma: no cover - runtime fallback
+    torch = None  # type: ignore[assignment]
+
 
 RELATIVE_KEYWORDS = {
     "сегодня": 0,
@@ -63,6 +73,40 @@ LABEL_KEYWORDS = {
     "ops": ["infra", "инфра", "ops", "поддерж"],
 }
 
+# One combined scanner over all keyword tables: a single finditer pass reports
+# every hit instead of one `in` scan per keyword. Longest alternative wins at a
+# given position, so e.g. "послезавтра" is no longer shadowed by "завтра".
+_KEYWORD_KIND: dict[str, str] = {}
+for _key in RELATIVE_KEYWORDS:
+    _KEYWORD_KIND[_key] = "relative"
+for _key in WEEKDAY_INDEX:
+    _KEYWORD_KIND[_key] = "weekday"
+for _label, _patterns in LABEL_KEYWORDS.items():
+    for _pattern in _patterns:
+        _KEYWORD_KIND[_pattern] = "label:" + _label
+
+KEYWORD_SCAN_RE = re.compile(
+    "|".join(re.escape(key) for key in sorted(_KEYWORD_KIND, key=len, reverse=True))
+)
+
+
+def _scan_keywords(lower_text: str) -> tuple[set[str], set[str], set[str]]:
+    """Collect relative-date keywords, weekdays and labels in one pass."""
+
+    relative: set[str] = set()
+    weekdays: set[str] = set()
+    labels: set[str] = set()
+    for match in KEYWORD_SCAN_RE.finditer(lower_text):
+        kind = _KEYWORD_KIND[match.group(0)]
+        if kind == "relative":
+            relative.add(match.group(0))
+        elif kind == "weekday":
+            weekdays.add(match.group(0))
+        else:
+            labels.add(kind.partition(":")[2])
+    return relative, weekdays, labels
+
+
 MONTH_NAME_MAP = {
     "январ": 1,
     "феврал": 2,
@@ -91,7 +135,41 @@ MONTH_NAME_MAP = {
     "december": 12,
 }
 
-DATE_PATTERNS = ["%d.%m.%Y", "%d.%m.%y", "%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d"]
+# Single pattern covering the numeric formats previously tried one strptime
+# call at a time: dd.mm[.yy[yy]], dd/mm[/yy[yy]] (same separator both times)
+# and ISO yyyy-mm-dd.
+NUMERIC_DATE_RE = re.compile(
+    r"^(?:(?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})"
+    r"|(?P<day>\d{1,2})(?P<sep>[./])(?P<month>\d{1,2})(?:(?P=sep)(?P<year>\d{2,4}))?)$"
+)
+
+ASSIGNEE_RE = re.compile(r"@?[A-ZА-ЯЁ][a-zа-яё]+")
+
+FUZZY_NUMERIC_DATE_RE = re.compile(r"(\d{1,2}[./]\d{1,2}(?:[./]\d{2,4})?)")
+
+DAY_MONTH_NAME_RE = re.compile(r"(\d{1,2})\s+([A-Za-zА-Яа-яё]+)")
+
+YEAR_RE = re.compile(r"(\d{4})")
+
+LABEL_SPACE_TRANSLATE = str.maketrans(" ", "-")
+
+ASSIGNEE_STOPWORDS = frozenset({"we", "i", "он", "она", "они"})
+
+
+@lru_cache(maxsize=1)
+def _today_from_epoch(day_key: int) -> date:
+    return datetime.utcnow().date()
+
+
+def _utc_today() -> date:
+    """Today's UTC date, recomputed at most once per epoch day.
+
+    The date-heuristic helpers hit this several times per action item;
+    caching on the epoch-day integer avoids a syscall-backed datetime
+    construction on every lookup while still rolling over at midnight.
+    """
+
+    return _today_from_epoch(int(time.time() // 86400))
 
 
 def _resolve_llm_path() -> tuple[str, bool]:
@@ -111,6 +189,11 @@ class LLMTaskEnricher:
         self._max_new_tokens = int(os.getenv("OPEN_SOURCE_LLM_MAX_NEW_TOKENS", "256"))
         self._temperature = float(os.getenv("OPEN_SOURCE_LLM_TEMPERATURE", "0.0"))
         self._disabled = os.getenv("OPEN_SOURCE_LLM_DISABLED") == "1"
+        self._cache_size = int(os.getenv("OPEN_SOURCE_LLM_CACHE_SIZE", "4096"))
+        self._heuristic_skip = os.getenv("OPEN_SOURCE_LLM_HEURISTIC_SKIP", "1") == "1"
+        self._batch_size = int(os.getenv("OPEN_SOURCE_LLM_BATCH_SIZE", "4"))
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # Lifecycle
@@ -127,13 +210,40 @@ class LLMTaskEnricher:
 
         model_path, local_only = _resolve_llm_path()
         try:
-            tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=local_only)
-            model = AutoModelForCausalLM.from_pretrained(model_path, local_files_only=local_only)
+            try:
+                tokenizer = AutoTokenizer.from_pretrained(
+                    model_path, local_files_only=local_only, use_fast=True
+                )
+            except Exception as fast_exc:
+                logger.warning(
+                    "Fast tokenizer unavailable for the enrichment LLM (%s), retrying slow",
+                    fast_exc,
+                )
+                tokenizer = AutoTokenizer.from_pretrained(
+                    model_path, local_files_only=local_only, use_fast=False
+                )
+            if not getattr(tokenizer, "is_fast", False):
+                logger.warning("Slow tokenizer in use for the enrichment LLM")
+            tokenizer("warmup")
+            if tokenizer.pad_token is None:
+                # Batched generation pads prompts to a common length and
+                # TinyLlama-style checkpoints ship without a pad token.
+                tokenizer.pad_token = tokenizer.eos_token
+            # Decoder-only models must be left-padded so every prompt ends at
+            # the last position; right padding corrupts the continuations.
+            tokenizer.padding_side = "left"
+            model_kwargs: dict[str, Any] = {"local_files_only": local_only}
+            if torch is not None and torch.cuda.is_available():
+                # Half precision halves memory traffic and unlocks tensor cores;
+                # device_map lets accelerate shard across available GPUs.
+                dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+                model_kwargs.update(torch_dtype=dtype, device_map="auto")
+                logger.info("Loading open-source LLM on GPU", extra={"dtype": str(dtype)})
+            model = AutoModelForCausalLM.from_pretrained(model_path, **model_kwargs)
             self._generator = pipeline(
                 "text-generation",
                 model=model,
                 tokenizer=tokenizer,
-                device_map="auto" if hasattr(model, "to") else None,
                 max_new_tokens=self._max_new_tokens,
                 temperature=self._temperature,
                 do_sample=self._temperature > 0,
@@ -148,33 +258,78 @@ class LLMTaskEnricher:
     def shutdown(self) -> None:
         self._generator = None
         self._tokenizer = None
+        with self._cache_lock:
+            self._cache.clear()
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
     def enrich(self, item: ActionItem, context: str) -> ActionItem:
-        if self._generator is None:
-            return self._fallback_enrich(item, context)
+        return self.enrich_many([item], context)[0]
 
-        prompt = self._build_prompt(item.summary, context)
-        try:
-            outputs = self._generator(
-                prompt,
-                max_new_tokens=self._max_new_tokens,
-                pad_token_id=self._tokenizer.eos_token_id if self._tokenizer else None,
-            )
-        except Exception as exc:  # pragma: no cover - runtime fallback
-            logger.warning("Open-source LLM enrichment failed: %s", exc)
-            return self._fallback_enrich(item, context)
+    def enrich_many(self, items: list[ActionItem], context: str) -> list[ActionItem]:
+        """Enrich all items from one transcript with a single batched generation."""
 
-        generated = outputs[0]["generated_text"] if outputs else ""
-        cleaned = generated[len(prompt) :] if generated.startswith(prompt) else generated
-        payload = self._extract_json(cleaned)
+        if not items:
+            return []
+        if self._generator is None:
+            return [self._fallback_enrich(item, context) for item in items]
+
+        results: list[Optional[ActionItem]] = [None] * len(items)
+        pending: list[int] = []
+        prompts: list[str] = []
+        keys: list[str] = []
+        for index, item in enumerate(items):
+            if self._heuristic_skip:
+                shortcut = self._heuristic_shortcut(item, context)
+                if shortcut is not None:
+                    results[index] = shortcut
+                    continue
+            key = hashlib.blake2b(
+                (item.summary + "\x1f" + context).encode("utf-8"), digest_size=16
+            ).hexdigest()
+            cached = self._cache_get(key)
+            if cached is not None:
+                results[index] = self._apply_generation(item, context, cached)
+            else:
+                pending.append(index)
+                prompts.append(self._build_prompt(item.summary, context))
+                keys.append(key)
+
+        if pending:
+            try:
+                outputs = self._generator(
+                    prompts,
+                    batch_size=min(self._batch_size, len(prompts)),
+                    max_new_tokens=self._max_new_tokens,
+                    pad_token_id=self._tokenizer.eos_token_id if self._tokenizer else None,
+                )
+            except Exception as exc:  # pragma: no cover - runtime fallback
+                logger.warning("Open-source LLM enrichment failed: %s", exc)
+                outputs = None
+            for slot, index in enumerate(pending):
+                item = items[index]
+                if outputs is None:
+                    results[index] = self._fallback_enrich(item, context)
+                    continue
+                output = outputs[slot]
+                if isinstance(output, list):
+                    output = output[0] if output else {}
+                generated = output.get("generated_text", "") if isinstance(output, dict) else ""
+                prompt = prompts[slot]
+                cleaned = generated[len(prompt) :] if generated.startswith(prompt) else generated
+                self._cache_put(keys[slot], cleaned)
+                results[index] = self._apply_generation(item, context, cleaned)
+
+        return [result for result in results if result is not None]
+
+    def _apply_generation(self, item: ActionItem, context: str, generated: str) -> ActionItem:
+        payload = self._extract_json(generated)
         if payload is None:
-            logger.debug("LLM returned non-JSON payload: %s", cleaned)
+            logger.debug("LLM returned non-JSON payload: %s", generated)
             return self._fallback_enrich(item, context)
 
-        enriched = ActionItem(
+        return ActionItem(
             summary=item.summary,
             confidence=item.confidence,
             source=item.source,
@@ -183,11 +338,24 @@ class LLMTaskEnricher:
             priority=self._safe_strip(payload.get("priority")),
             labels=self._normalise_labels(payload.get("labels")),
         )
-        return enriched
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._cache_lock:
+            if key not in self._cache:
+                return None
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+    def _cache_put(self, key: str, value: str) -> None:
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
     @staticmethod
     def _build_prompt(task: str, context: str) -> str:
         return (
@@ -216,11 +384,12 @@ class LLMTaskEnricher:
     def _normalise_labels(self, value: Any) -> list[str]:
         if value is None:
             return self._heuristic_labels("")
-        if isinstance(value, list):
-            labels = [str(item).strip().lower().replace(" ", "-") for item in value if str(item).strip()]
-        else:
-            labels = [str(value).strip().lower().replace(" ", "-")]
-        labels = [label for label in labels if label]
+        raw = value if isinstance(value, list) else [value]
+        labels: list[str] = []
+        for item in raw:
+            label = str(item).strip().lower().translate(LABEL_SPACE_TRANSLATE)
+            if label:
+                labels.append(label)
         return labels or self._heuristic_labels("")
 
     def _normalise_due(self, value: Any) -> Optional[str]:
@@ -247,12 +416,13 @@ class LLMTaskEnricher:
         return None
 
     def _parse_relative_keyword(self, text: str) -> Optional[str]:
-        today = datetime.utcnow().date()
+        relative, weekdays, _ = _scan_keywords(text)
+        today = _utc_today()
         for key, offset in RELATIVE_KEYWORDS.items():
-            if key in text:
+            if key in relative:
                 return (today + timedelta(days=offset)).isoformat()
         for key, weekday_index in WEEKDAY_INDEX.items():
-            if key in text:
+            if key in weekdays:
                 days_ahead = (weekday_index - today.weekday()) % 7
                 if days_ahead == 0:
                     days_ahead = 7
@@ -260,12 +430,35 @@ class LLMTaskEnricher:
         return None
 
     def _heuristic_labels(self, text: str) -> list[str]:
-        detected: set[str] = set()
-        lower_text = text.lower()
-        for label, patterns in LABEL_KEYWORDS.items():
-            if any(pattern in lower_text for pattern in patterns):
-                detected.add(label)
-        return sorted(detected)
+        _, _, labels = _scan_keywords(text.lower())
+        return sorted(labels)
+
+    def _heuristic_shortcut(self, item: ActionItem, context: str) -> Optional[ActionItem]:
+        """Enrich without the LLM when every field resolves heuristically.
+
+        On easy items (explicit date, named person, label keyword present) the
+        generator would reproduce what the fallback heuristics already yield,
+        so the forward pass is pure waste.
+        """
+
+        due = self._heuristic_due(context, item.summary)
+        if due is None:
+            return None
+        assignee = self._heuristic_assignee(context, item.summary)
+        if assignee is None:
+            return None
+        labels = self._heuristic_labels(item.summary + " " + context)
+        if not labels:
+            return None
+        return ActionItem(
+            summary=self._fallback_summary(item.summary),
+            confidence=item.confidence,
+            source=item.source,
+            assignee=assignee,
+            due=due,
+            priority=self._fallback_priority(item.summary),
+            labels=labels,
+        )
 
     def _fallback_enrich(self, item: ActionItem, context: str) -> ActionItem:
         summary = self._fallback_summary(item.summary)
@@ -301,17 +494,18 @@ class LLMTaskEnricher:
 
     def _heuristic_due(self, context: str, summary: str) -> Optional[str]:
         text = f"{summary}. {context}".lower()
+        relative, weekdays, _ = _scan_keywords(text)
         for keyword, offset in RELATIVE_KEYWORDS.items():
-            if keyword in text:
-                return (datetime.utcnow().date() + timedelta(days=offset)).isoformat()
-        date_pattern = re.search(r"(\d{1,2}[./]\d{1,2}(?:[./]\d{2,4})?)", text)
+            if keyword in relative:
+                return (_utc_today() + timedelta(days=offset)).isoformat()
+        date_pattern = FUZZY_NUMERIC_DATE_RE.search(text)
         if date_pattern:
             explicit = self._parse_explicit_date(date_pattern.group(1))
             if explicit:
                 return explicit
         for keyword, weekday_index in WEEKDAY_INDEX.items():
-            if keyword in text:
-                today = datetime.utcnow().date()
+            if keyword in weekdays:
+                today = _utc_today()
                 days_ahead = (weekday_index - today.weekday()) % 7
                 if days_ahead == 0:
                     days_ahead = 7
@@ -320,21 +514,18 @@ class LLMTaskEnricher:
 
     @staticmethod
     def _heuristic_assignee(context: str, summary: str) -> Optional[str]:
-        pattern = re.compile(r"(@?[A-ZА-ЯЁ][a-zа-яё]+)")
         for chunk in (summary, context):
-            match = pattern.search(chunk)
-            if match:
-                value = match.group(1).lstrip("@")
-                if value.lower() not in {"we", "i", "он", "она", "они"}:
+            for match in ASSIGNEE_RE.finditer(chunk):
+                value = match.group(0).lstrip("@")
+                if value.lower() not in ASSIGNEE_STOPWORDS:
                     return value
         return None
 
     @staticmethod
     def _extract_json(text: str) -> Optional[dict[str, Any]]:
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if not match:
+        candidate = LLMTaskEnricher._first_balanced_object(text)
+        if candidate is None:
             return None
-        candidate = match.group(0)
         try:
             return json.loads(candidate)
         except json.JSONDecodeError:
@@ -344,30 +535,77 @@ class LLMTaskEnricher:
             except Exception:  # pragma: no cover - depends on input
                 return None
 
+    @staticmethod
+    def _first_balanced_object(text: str) -> Optional[str]:
+        """Return the first balanced ``{...}`` span via a single linear scan.
+
+        Replaces the old DOTALL ``\\{.*\\}`` search, which was greedy (it
+        swallowed everything between the first and last brace) and scanned
+        the whole tail on every generation.
+        """
+
+        start = text.find("{")
+        if start == -1:
+            return None
+        depth = 0
+        in_string = False
+        escaped = False
+        for index in range(start, len(text)):
+            char = text[index]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+                continue
+            if char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    return text[start : index + 1]
+        return None
+
     def _parse_explicit_date(self, text: str) -> Optional[str]:
         cleaned = text.strip()
-        for pattern in DATE_PATTERNS:
+        match = NUMERIC_DATE_RE.match(cleaned)
+        if match:
+            if match.group("iso_year"):
+                year = int(match.group("iso_year"))
+                month = int(match.group("iso_month"))
+                day = int(match.group("iso_day"))
+            else:
+                day = int(match.group("day"))
+                month = int(match.group("month"))
+                raw_year = match.group("year")
+                if raw_year is None:
+                    year = _utc_today().year
+                elif len(raw_year) == 2:
+                    year = 2000 + int(raw_year)
+                else:
+                    year = int(raw_year)
             try:
-                parsed = datetime.strptime(cleaned, pattern)
-                year = parsed.year if parsed.year != 1900 else datetime.utcnow().year
-                parsed = parsed.replace(year=year)
-                return parsed.date().isoformat()
+                return date(year, month, day).isoformat()
             except ValueError:
-                continue
+                return None
 
-        month_match = re.search(r"(\d{1,2})\s+([A-Za-zА-Яа-яё]+)", cleaned)
+        month_match = DAY_MONTH_NAME_RE.search(cleaned)
         if month_match:
             day = int(month_match.group(1))
             month_token = month_match.group(2).lower()
             for token, month in MONTH_NAME_MAP.items():
                 if token in month_token:
-                    year_match = re.search(r"(\d{4})", cleaned)
-                    year = int(year_match.group(1)) if year_match else datetime.utcnow().year
+                    year_match = YEAR_RE.search(cleaned)
+                    year = int(year_match.group(1)) if year_match else _utc_today().year
                     try:
                         candidate_date = datetime(year, month, day)
                     except ValueError:
                         return None
-                    if candidate_date.date() < datetime.utcnow().date():
+                    if candidate_date.date() < _utc_today():
                         candidate_date = candidate_date.replace(year=year + 1)
                     return candidate_date.date().isoformat()
         return None
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
 import re
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from collections import OrderedDict
 from typing import Dict, Iterable, List, Optional, Tuple
 
@@ -21,6 +24,42 @@ except Exception as exc:  # pragma: no cover - runtime fallback
     AutoTokenizer = None  # type: ignore[assignment]
     logger.warning("Transformers stack is unavailable: %s", exc)
 
+try:  # pragma: no cover - optional dependency guard
+    import regex as _regex_engine  # faster matching engine, drop-in for `re`
+except Exception:  # pragma: no cover - runtime fallback
+    _regex_engine = re  # type: ignore[assignment]
+
+try:  # pragma: no cover - optional dependency guard
+    from optimum.onnxruntime import (  # type: ignore[import-not-found]
+        ORTModelForSequenceClassification,
+        ORTQuantizer,
+    )
+    from optimum.onnxruntime.configuration import (  # type: ignore[import-not-found]
+        AutoQuantizationConfig,
+    )
+except Exception as exc:  # pragma: no cover - runtime fallback
+    ORTModelForSequenceClassification = None  # type: ignore[assignment]
+    ORTQuantizer = None  # type: ignore[assignment]
+    AutoQuantizationConfig = None  # type: ignore[assignment]
+    logger.info("ONNX Runtime stack is unavailable: %s", exc)
+
+try:  # pragma: no cover - optional dependency guard
+    import onnxruntime as ort  # type: ignore[import-not-found]
+except Exception:  # pragma: no cover - runtime fallback
+    ort = None  # type: ignore[assignment]
+
+try:  # pragma: no cover - optional dependency guard
+    from optimum.bettertransformer import BetterTransformer  # type: ignore[import-not-found]
+except Exception:  # pragma: no cover - runtime fallback
+    BetterTransformer = None  # type: ignore[assignment]
+
+try:  # pragma: no cover - optional dependency guard
+    import numpy as np
+    from numba import njit  # type: ignore[import-not-found]
+except Exception:  # pragma: no cover - runtime fallback
+    np = None  # type: ignore[assignment]
+    njit = None  # type: ignore[assignment]
+
 from .llm import LLMTaskEnricher
 from .task_types import ActionItem
 
@@ -66,30 +105,130 @@ VERB_STEMS = [
     "контакт",
 ]
 
-VERB_RE = re.compile(
-    r"(" +
-    "|".join(f"{stem}\\w*" for stem in VERB_STEMS) +
-    r"|review|plan|schedule|deploy|implement|prepare|send|create|write|check|fix|update|investigate|present|follow\\s*up)",
+ACTION_VERBS_EN = [
+    "review",
+    "plan",
+    "schedule",
+    "deploy",
+    "implement",
+    "prepare",
+    "send",
+    "create",
+    "write",
+    "check",
+    "fix",
+    "update",
+    "investigate",
+    "present",
+    "follow",
+]
+
+
+def _build_trie_pattern(words: List[str]) -> str:
+    """Render a set of literals as a prefix-trie alternation.
+
+    Shared prefixes collapse into one branch, so the scanner decides between
+    alternatives one character at a time instead of backtracking through a
+    flat |-joined list on every failed stem.
+    """
+
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict[str, dict]) -> str:
+        optional = "" in node
+        branches = [
+            re.escape(char) + render(child)
+            for char, child in sorted(node.items())
+            if char != ""
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        pattern = "(?:" + "|".join(branches) + ")"
+        return pattern + "?" if optional else pattern
+
+    return render(trie)
+
+
+VERB_RE = _regex_engine.compile(
+    "(" + _build_trie_pattern(VERB_STEMS + ACTION_VERBS_EN) + r"\w*)",
     flags=re.IGNORECASE,
 )
 
-COMPOUND_SEPARATORS = re.compile(
+COMPOUND_SEPARATORS = _regex_engine.compile(
     r"\b(и|а также|затем|после этого|потом|далее|and then|and)\b",
     flags=re.IGNORECASE,
 )
 
-SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|[\n\r]+|•\s*| - ")
+SENTENCE_SPLIT_RE = _regex_engine.compile(r"(?<=[.!?])\s+|[\n\r]+|•\s*| - ")
+
+LEAD_STRIP_RE = re.compile(r"(?i)^(?:нужно|надо|будет|давайте|давай|предлагаю|let's|let us)\s+")
+CLEAN_LEAD_RE = re.compile(r"(?i)^(прошу|нужно|надо|будет|давайте|давай|пожалуйста)\s+")
+TRAIL_PUNCT_RE = re.compile(r"[\.!\s]+$")
 
 MAX_TASK_WORDS = 16
 MAX_TASK_LENGTH = 140
 
+# Candidates that start with a known action verb, stay short and contain no
+# hedging can skip the NLI forward pass entirely; they are near-certain
+# imperatives and get this fixed confidence instead.
+IMPERATIVE_RE = _regex_engine.compile(
+    r"^(?:" + _build_trie_pattern(VERB_STEMS + ACTION_VERBS_EN) + r")\w*\b",
+    flags=re.IGNORECASE,
+)
+HEDGE_WORDS = frozenset(
+    {
+        "если",
+        "может",
+        "можно",
+        "возможно",
+        "вдруг",
+        "ли",
+        "наверное",
+        "if",
+        "maybe",
+        "might",
+        "whether",
+        "could",
+        "perhaps",
+        "probably",
+    }
+)
+HEURISTIC_SKIP_CONFIDENCE = 0.9
+HEURISTIC_SKIP_MAX_WORDS = 8
+
+
+def is_clear_imperative(candidate: str) -> bool:
+    """Return True when the candidate is an unambiguous short imperative."""
+
+    if IMPERATIVE_RE.match(candidate) is None:
+        return False
+    words = candidate.lower().split()
+    if len(words) > HEURISTIC_SKIP_MAX_WORDS:
+        return False
+    return not any(word.strip(",.;:") in HEDGE_WORDS for word in words)
+
 
 class ModelBundle:
     """Container that keeps tokenizer/model pairs in memory."""
 
-    def __init__(self, tokenizer: "AutoTokenizer", model: "AutoModelForSequenceClassification") -> None:  # type: ignore[name-defined]
+    def __init__(
+        self,
+        tokenizer: "AutoTokenizer",  # type: ignore[name-defined]
+        model: "AutoModelForSequenceClassification",  # type: ignore[name-defined]
+        hypothesis_ids: Optional[Dict[str, List[int]]] = None,
+    ) -> None:
         self.tokenizer = tokenizer
         self.model = model
+        # Hypothesis token ids per language, encoded once at load time so the
+        # scoring path never re-tokenizes the fixed hypothesis strings.
+        self.hypothesis_ids = hypothesis_ids or {}
 
 
 class ExtractionError(RuntimeError):
@@ -101,9 +240,15 @@ class TaskExtractor:
 
     def __init__(self, entail_threshold: float = 0.60) -> None:
         self._entail_threshold = entail_threshold
+        self._batch_size = int(os.getenv("NLI_BATCH_SIZE", "16"))
+        self._heuristic_skip = os.getenv("NLI_HEURISTIC_SKIP", "1") == "1"
         self._models: Dict[str, Optional[ModelBundle]] = {}
         self._lock = threading.Lock()
         self._initialised = False
+        self._compiled = False
+        self._result_cache_size = int(os.getenv("TASK_CACHE_SIZE", "1024"))
+        self._result_cache: "OrderedDict[str, List[ActionItem]]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
         self._enricher = LLMTaskEnricher()
 
     # ------------------------------------------------------------------
@@ -117,7 +262,9 @@ class TaskExtractor:
                 logger.debug("startup() called but extractor is already initialised")
                 return
             logger.info("Loading NLI models (entail_threshold=%.2f)", self._entail_threshold)
+            self._configure_torch_threads()
             self._models = self._load_models()
+            self._warmup_models()
             self._initialised = True
             logger.info("TaskExtractor initialised with models: %s", list(self._models))
         self._enricher.startup()
@@ -131,6 +278,8 @@ class TaskExtractor:
             self._models.clear()
             self._initialised = False
             logger.info("TaskExtractor has been shut down")
+        with self._result_cache_lock:
+            self._result_cache.clear()
         self._enricher.shutdown()
 
     # ------------------------------------------------------------------
@@ -142,6 +291,12 @@ class TaskExtractor:
             logger.info("Empty text received, returning no tasks")
             return []
 
+        cache_key = hashlib.blake2b(stripped.encode("utf-8"), digest_size=16).hexdigest()
+        cached = self._result_cache_get(cache_key)
+        if cached is not None:
+            logger.info("Returning cached extraction for repeated transcript")
+            return cached
+
         lang = detect_lang_code(stripped)
         candidates = candidate_actions(stripped)
         logger.info("Detected language %s, candidate fragments: %d", lang, len(candidates))
@@ -153,58 +308,236 @@ class TaskExtractor:
         if target_bundle is None:
             logger.warning("NLI model for %s is unavailable; falling back to heuristic scoring", lang)
 
-        scored: List[Tuple[str, float, str]] = []
+        # Candidates are kept as parallel arrays (texts/sources plus the score
+        # column produced below) so the whole transcript travels through the
+        # tokenizer and model as one batch without per-candidate tuples.
+        texts: List[str] = []
+        sources: List[str] = []
         for candidate in candidates:
             cleaned = clean_candidate(candidate)
-            if not cleaned:
-                continue
-            score = self._score_candidate(cleaned, lang)
+            if cleaned:
+                texts.append(cleaned)
+                sources.append(candidate)
+        if not texts:
+            return []
+
+        # Unambiguous imperatives get a fixed confidence without touching the
+        # model; only the ambiguous remainder enters the batched NLI path.
+        scores: List[Optional[float]] = [None] * len(texts)
+        pending: List[int] = list(range(len(texts)))
+        if self._heuristic_skip:
+            pending = []
+            for index, cleaned in enumerate(texts):
+                if is_clear_imperative(cleaned):
+                    scores[index] = HEURISTIC_SKIP_CONFIDENCE
+                else:
+                    pending.append(index)
+        if pending:
+            nli_scores = self._score_candidates(
+                texts if len(pending) == len(texts) else [texts[index] for index in pending],
+                lang,
+            )
+            for index, score in zip(pending, nli_scores):
+                scores[index] = score
+
+        # Plain dicts preserve insertion order, so first occurrence wins the
+        # output position while a later duplicate can still raise the score.
+        deduped: Dict[str, Tuple[float, str]] = {}
+        for summary, score, source in zip(texts, scores, sources):
             if score is None:
                 continue
-            scored.append((cleaned, score, candidate))
+            prev = deduped.get(summary)
+            if prev is None or score > prev[0]:
+                deduped[summary] = (score, source)
 
-        if not scored:
+        if not deduped:
             return []
 
-        deduped: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
-        for summary, score, source in scored:
-            if summary not in deduped or score > deduped[summary][0]:
-                deduped[summary] = (score, source)
-
-        results: List[ActionItem] = []
-        for summary, (score, source) in deduped.items():
-            base_item = ActionItem(summary=summary, confidence=score, source=source)
-            enriched = self._enricher.enrich(base_item, text)
-            results.append(enriched)
+        base_items = [
+            ActionItem(summary=summary, confidence=score, source=source)
+            for summary, (score, source) in deduped.items()
+        ]
+        results = self._enricher.enrich_many(base_items, text)
+        self._result_cache_put(cache_key, results)
         return results
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
-    def _score_candidate(self, text: str, lang: str) -> Optional[float]:
+    def _warmup_models(self) -> None:
+        """Score one dummy batch per language during startup.
+
+        Graph capture (torch.compile), lazy kernel selection and tokenizer
+        initialisation all trigger on the first forward pass; running it here
+        keeps those costs out of the first request.
+        """
+
+        if torch is None:
+            return
+        for lang, bundle in self._models.items():
+            if bundle is None:
+                continue
+            try:
+                self._score_candidates(["warmup"], lang)
+            except Exception as exc:  # pragma: no cover - depends on environment
+                logger.warning("Warmup scoring failed for %s: %s", lang, exc)
+
+    def _result_cache_get(self, key: str) -> Optional[List[ActionItem]]:
+        with self._result_cache_lock:
+            if key not in self._result_cache:
+                return None
+            self._result_cache.move_to_end(key)
+            items = self._result_cache[key]
+        # Hand out copies so callers cannot mutate the cached entries.
+        return [replace(item, labels=list(item.labels)) for item in items]
+
+    def _result_cache_put(self, key: str, items: List[ActionItem]) -> None:
+        if self._result_cache_size <= 0:
+            return
+        with self._result_cache_lock:
+            self._result_cache[key] = [
+                replace(item, labels=list(item.labels)) for item in items
+            ]
+            self._result_cache.move_to_end(key)
+            while len(self._result_cache) > self._result_cache_size:
+                self._result_cache.popitem(last=False)
+
+    def _score_candidates(self, texts: List[str], lang: str) -> List[Optional[float]]:
+        """Score all candidates for one language in a single padded NLI batch."""
+
         bundle = self._models.get("ru" if lang == "ru" else "en")
-        if bundle is None:
+        if bundle is None or torch is None:
             # No model available for language – fallback to heuristic acceptance
-            return 0.65
+            return [0.65] * len(texts)
+
+        tokenizer = bundle.tokenizer
+        hypothesis_ids = bundle.hypothesis_ids.get(lang)
+        if hypothesis_ids is None:
+            hypothesis = LANGUAGE_HYPOTHESES.get(lang, LANGUAGE_HYPOTHESES["en"])
+            hypothesis_ids = tokenizer(hypothesis, add_special_tokens=False)["input_ids"]
+
+        # Tokenize only the candidate side; the fixed hypothesis ids are
+        # spliced in via the tokenizer's own pair-building helpers, and
+        # candidates of similar token length are batched together so each
+        # sub-batch only pads to its own longest sequence.
+        use_type_ids = "token_type_ids" in tokenizer.model_input_names
+        budget = 256 - len(hypothesis_ids) - tokenizer.num_special_tokens_to_add(pair=True)
+        features: List[Dict[str, List[int]]] = []
+        for text_ids in tokenizer(texts, add_special_tokens=False)["input_ids"]:
+            if budget > 0:
+                text_ids = text_ids[:budget]
+            feature = {
+                "input_ids": tokenizer.build_inputs_with_special_tokens(
+                    text_ids, hypothesis_ids
+                )
+            }
+            if use_type_ids:
+                feature["token_type_ids"] = tokenizer.create_token_type_ids_from_sequences(
+                    text_ids, hypothesis_ids
+                )
+            features.append(feature)
+
+        lengths = [len(feature["input_ids"]) for feature in features]
+        order = sorted(range(len(texts)), key=lengths.__getitem__)
+        device = getattr(bundle.model, "device", None)
+
+        entail_probs: List[float] = [0.0] * len(texts)
+        for offset in range(0, len(order), self._batch_size):
+            batch_indices = order[offset : offset + self._batch_size]
+            inputs = tokenizer.pad(
+                [features[index] for index in batch_indices],
+                # Compiled graphs want a stable sequence length to avoid
+                # recompilation on every new padded width.
+                padding="max_length" if self._compiled else True,
+                max_length=256 if self._compiled else None,
+                return_tensors="pt",
+            )
+            if device is not None and getattr(device, "type", "cpu") != "cpu":
+                inputs = inputs.to(device)
+            with torch.inference_mode():  # type: ignore[attr-defined]
+                logits = bundle.model(**inputs).logits
+                batch_probs = torch.softmax(logits, dim=-1)[:, -1].tolist()
+            for slot, index in enumerate(batch_indices):
+                entail_probs[index] = batch_probs[slot]
+        return [
+            prob if prob >= self._entail_threshold else None
+            for prob in entail_probs
+        ]
+
+    @staticmethod
+    def _apply_dtype(model: object, lang: str) -> object:
+        """Cast NLI weights per NLI_DTYPE (auto/bf16/fp16/fp32).
+
+        "auto" means fp16 on GPU and untouched fp32 on CPU — blind bf16 on
+        CPUs without native AVX512-BF16 support is slower than fp32, so the
+        CPU cast stays opt-in.
+        """
+
+        if torch is None:
+            return model
+        choice = os.getenv("NLI_DTYPE", "auto").lower()
+        on_gpu = torch.cuda.is_available()
+        try:
+            if choice == "auto":
+                if on_gpu:
+                    model = model.half().cuda()  # type: ignore[attr-defined]
+            elif choice in ("bf16", "bfloat16"):
+                model = model.to(torch.bfloat16)  # type: ignore[attr-defined]
+                if on_gpu:
+                    model = model.cuda()  # type: ignore[attr-defined]
+            elif choice in ("fp16", "float16", "half"):
+                model = model.half()  # type: ignore[attr-defined]
+                if on_gpu:
+                    model = model.cuda()  # type: ignore[attr-defined]
+            elif choice not in ("fp32", "float32"):
+                logger.warning("Unknown NLI_DTYPE %r, keeping fp32", choice)
+        except Exception as exc:  # pragma: no cover - depends on hardware
+            logger.warning("Failed to cast %s NLI model to %s: %s", lang, choice, exc)
+        return model
+
+    @staticmethod
+    def _quantize_int8(model: object, lang: str) -> object:
+        """Apply dynamic int8 quantization to Linear layers when requested.
+
+        Only meaningful for fp32 CPU models; enable with NLI_QUANT_INT8=1
+        to A/B against the full-precision path.
+        """
+
+        if torch is None or os.getenv("NLI_QUANT_INT8") != "1":
+            return model
+        try:
+            model = torch.quantization.quantize_dynamic(  # type: ignore[attr-defined]
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info("Dynamic int8 quantization applied to %s NLI model", lang)
+        except Exception as exc:  # pragma: no cover - depends on environment
+            logger.warning("Dynamic quantization failed for %s: %s", lang, exc)
+        return model
+
+    @staticmethod
+    def _configure_torch_threads() -> None:
+        """Pin torch thread pools for short-sequence CPU inference."""
 
         if torch is None:
-            return 0.65
-
-        inputs = bundle.tokenizer(
-            [text],
-            [LANGUAGE_HYPOTHESES.get(lang, LANGUAGE_HYPOTHESES["en"])],
-            return_tensors="pt",
-            truncation=True,
-            padding=True,
-            max_length=256,
+            return
+        intraop = int(os.getenv("TORCH_NUM_THREADS", str(max(1, (os.cpu_count() or 2) // 2))))
+        interop = int(os.getenv("TORCH_INTEROP_THREADS", "1"))
+        torch.set_num_threads(intraop)
+        try:
+            torch.set_num_interop_threads(interop)
+        except RuntimeError:
+            # Interop pool can only be sized before any parallel work has run.
+            logger.debug("Interop thread pool already initialised, leaving as-is")
+        try:
+            torch.backends.mkldnn.enabled = True
+            # "medium" allows bf16-accumulated fp32 matmuls on capable CPUs.
+            torch.set_float32_matmul_precision("medium")
+        except Exception as exc:  # pragma: no cover - depends on torch build
+            logger.debug("Could not tune matmul backends: %s", exc)
+        logger.info(
+            "Torch thread pools configured",
+            extra={"intraop_threads": intraop, "interop_threads": interop},
         )
-        with torch.inference_mode():  # type: ignore[attr-defined]
-            logits = bundle.model(**inputs).logits[0]
-            probs = torch.softmax(logits, dim=-1)
-            entail_prob = float(probs[-1])
-        if entail_prob >= self._entail_threshold:
-            return entail_prob
-        return None
 
     def _load_models(self) -> Dict[str, Optional[ModelBundle]]:
         models: Dict[str, Optional[ModelBundle]] = {"ru": None, "en": None}
@@ -212,69 +545,256 @@ class TaskExtractor:
             logger.warning("Transformers are unavailable, skipping model loading")
             return models
 
-        registry = {
-            "ru": (
-                os.getenv("RU_NLI_MODEL_DIR", "models/nli-ru"),
-                os.getenv("RU_NLI_MODEL_NAME", "cointegrated/rubert-base-cased-nli-threeway"),
-            ),
-            "en": (
-                os.getenv("EN_NLI_MODEL_DIR", "models/nli-en"),
-                os.getenv("EN_NLI_MODEL_NAME", "facebook/bart-large-mnli"),
-            ),
-        }
-
-        for lang, (local_dir, remote_name) in registry.items():
-            path = local_dir if os.path.isdir(local_dir) else remote_name
-            local_only = os.path.isdir(local_dir)
-            start = time.perf_counter()
+        if os.getenv("NLI_MULTILINGUAL") == "1" or os.getenv("MULTI_NLI_MODEL_NAME"):
+            # A single multilingual model serves both languages: one weight set
+            # in RAM and one shared batch regardless of transcript language.
+            registry = {
+                "multi": (
+                    os.getenv("MULTI_NLI_MODEL_DIR", "models/nli-multi"),
+                    os.getenv(
+                        "MULTI_NLI_MODEL_NAME",
+                        "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7",
+                    ),
+                ),
+            }
+        else:
+            if os.getenv("NLI_DISTILLED") == "1":
+                # Distilled checkpoints trade a little accuracy for far fewer
+                # layers, which dominates CPU latency.
+                ru_default = "cointegrated/rubert-tiny-bilingual-nli"
+                en_default = "valhalla/distilbart-mnli-12-3"
+            else:
+                ru_default = "cointegrated/rubert-base-cased-nli-threeway"
+                en_default = "facebook/bart-large-mnli"
+            registry = {
+                "ru": (
+                    os.getenv("RU_NLI_MODEL_DIR", "models/nli-ru"),
+                    os.getenv("RU_NLI_MODEL_NAME", ru_default),
+                ),
+                "en": (
+                    os.getenv("EN_NLI_MODEL_DIR", "models/nli-en"),
+                    os.getenv("EN_NLI_MODEL_NAME", en_default),
+                ),
+            }
+
+        if len(registry) > 1:
+            # The per-language loads are independent and dominated by
+            # checkpoint I/O and weight decode, so they overlap well.
+            with ThreadPoolExecutor(max_workers=len(registry)) as executor:
+                futures = {
+                    lang: executor.submit(self._load_single_model, lang, local_dir, remote_name)
+                    for lang, (local_dir, remote_name) in registry.items()
+                }
+                for lang, future in futures.items():
+                    models[lang] = future.result()
+        else:
+            for lang, (local_dir, remote_name) in registry.items():
+                models[lang] = self._load_single_model(lang, local_dir, remote_name)
+
+        if "multi" in models:
+            shared = models.pop("multi")
+            models = {"ru": shared, "en": shared}
+        return models
+
+    def _load_single_model(
+        self, lang: str, local_dir: str, remote_name: str
+    ) -> Optional[ModelBundle]:
+        path = local_dir if os.path.isdir(local_dir) else remote_name
+        local_only = os.path.isdir(local_dir)
+        start = time.perf_counter()
+        logger.info(
+            "Loading %s NLI model", lang,
+            extra={
+                "path": path,
+                "local_dir": local_dir,
+                "local_only": local_only,
+            },
+        )
+        try:
+            try:
+                tokenizer = AutoTokenizer.from_pretrained(
+                    path, local_files_only=local_only, use_fast=True
+                )
+            except Exception as fast_exc:
+                # Some checkpoints cannot convert to the Rust tokenizer; a slow
+                # tokenizer still beats losing the model entirely.
+                logger.warning(
+                    "Fast tokenizer unavailable for %s NLI model (%s), retrying slow",
+                    lang, fast_exc,
+                )
+                tokenizer = AutoTokenizer.from_pretrained(
+                    path, local_files_only=local_only, use_fast=False
+                )
+            if not getattr(tokenizer, "is_fast", False):
+                logger.warning("Slow tokenizer in use for %s NLI model", lang)
+            # Warm up the paired-sequence path so lazy initialisation does
+            # not land on the first request.
+            tokenizer(["warmup"], [LANGUAGE_HYPOTHESES.get(lang, LANGUAGE_HYPOTHESES["en"])],
+                      truncation=True, padding=True, max_length=256)
+            model = self._load_onnx_model(lang, path, local_only)
+            if model is None:
+                model = AutoModelForSequenceClassification.from_pretrained(
+                    path, local_files_only=local_only
+                )
+                model.eval()
+                model = self._apply_dtype(model, lang)
+                model = self._quantize_int8(model, lang)
+                if BetterTransformer is not None:
+                    try:
+                        model = BetterTransformer.transform(model, keep_original_model=False)
+                    except Exception as bt_exc:
+                        logger.debug(
+                            "BetterTransformer unsupported for %s: %s", lang, bt_exc
+                        )
+                if torch is not None and os.getenv("NLI_TORCH_COMPILE") == "1":
+                    try:
+                        model = torch.compile(  # type: ignore[attr-defined]
+                            model, mode="reduce-overhead", dynamic=True
+                        )
+                        self._compiled = True
+                        logger.info("torch.compile enabled for %s NLI model", lang)
+                    except Exception as compile_exc:
+                        logger.warning(
+                            "torch.compile failed for %s: %s", lang, compile_exc
+                        )
+            hypothesis_langs = ("ru", "en") if lang == "multi" else (lang,)
+            hypothesis_ids = {
+                hyp_lang: tokenizer(
+                    LANGUAGE_HYPOTHESES[hyp_lang], add_special_tokens=False
+                )["input_ids"]
+                for hyp_lang in hypothesis_langs
+                if hyp_lang in LANGUAGE_HYPOTHESES
+            }
+            bundle = ModelBundle(
+                tokenizer=tokenizer, model=model, hypothesis_ids=hypothesis_ids
+            )
+            elapsed = time.perf_counter() - start
             logger.info(
-                "Loading %s NLI model", lang,
+                "Loaded NLI model for %s", lang,
                 extra={
                     "path": path,
-                    "local_dir": local_dir,
                     "local_only": local_only,
+                    "elapsed_sec": round(elapsed, 2),
                 },
             )
-            try:
-                tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=local_only)
-                model = AutoModelForSequenceClassification.from_pretrained(
-                    path, local_files_only=local_only
+            return bundle
+        except Exception as exc:  # pragma: no cover - depends on environment
+            elapsed = time.perf_counter() - start
+            logger.warning(
+                "Failed to load NLI model for %s", lang,
+                extra={
+                    "path": path,
+                    "local_only": local_only,
+                    "elapsed_sec": round(elapsed, 2),
+                    "error": str(exc),
+                },
+            )
+            return None
+
+    def _load_onnx_model(self, lang: str, path: str, local_only: bool) -> Optional[object]:
+        """Return an int8 ONNX Runtime model for ``lang``, or None to use PyTorch.
+
+        The exported and dynamically quantized graph is cached on disk under
+        NLI_ONNX_DIR so subsequent start-ups skip the conversion entirely. The
+        cache directory is keyed on the resolved model id, so switching
+        checkpoints (model-name overrides, NLI_DISTILLED, local dirs)
+        re-exports instead of silently reusing the previous model's graph.
+        """
+
+        if ORTModelForSequenceClassification is None or os.getenv("NLI_ONNX", "1") != "1":
+            return None
+
+        model_key = hashlib.blake2b(path.encode("utf-8"), digest_size=8).hexdigest()
+        quant_dir = os.path.join(
+            os.getenv("NLI_ONNX_DIR", "models/onnx-nli"), f"{lang}-{model_key}"
+        )
+        quant_file = "model_quantized.onnx"
+        try:
+            if not os.path.exists(os.path.join(quant_dir, quant_file)):
+                logger.info("Exporting %s NLI model to ONNX", lang, extra={"quant_dir": quant_dir})
+                exported = ORTModelForSequenceClassification.from_pretrained(
+                    path, export=True, local_files_only=local_only
                 )
-                models[lang] = ModelBundle(tokenizer=tokenizer, model=model)
-                elapsed = time.perf_counter() - start
-                logger.info(
-                    "Loaded NLI model for %s", lang,
-                    extra={
-                        "path": path,
-                        "local_only": local_only,
-                        "elapsed_sec": round(elapsed, 2),
-                    },
+                exported.save_pretrained(quant_dir)
+                quantizer = ORTQuantizer.from_pretrained(quant_dir)
+                quantizer.quantize(
+                    save_dir=quant_dir,
+                    quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False),
                 )
-            except Exception as exc:  # pragma: no cover - depends on environment
-                models[lang] = None
-                elapsed = time.perf_counter() - start
-                logger.warning(
-                    "Failed to load NLI model for %s", lang,
-                    extra={
-                        "path": path,
-                        "local_only": local_only,
-                        "elapsed_sec": round(elapsed, 2),
-                        "error": str(exc),
-                    },
+            session_options = None
+            if ort is not None:
+                # Full graph optimization fuses LayerNorm/GELU/attention ops;
+                # the intra-op pool mirrors the torch thread configuration.
+                session_options = ort.SessionOptions()
+                session_options.graph_optimization_level = (
+                    ort.GraphOptimizationLevel.ORT_ENABLE_ALL
                 )
-
-        return models
+                session_options.intra_op_num_threads = int(
+                    os.getenv("TORCH_NUM_THREADS", str(max(1, (os.cpu_count() or 2) // 2)))
+                )
+            return ORTModelForSequenceClassification.from_pretrained(
+                quant_dir,
+                file_name=quant_file,
+                provider="CPUExecutionProvider",
+                session_options=session_options,
+            )
+        except Exception as exc:  # pragma: no cover - depends on environment
+            logger.warning(
+                "ONNX export failed for %s, using PyTorch weights", lang,
+                extra={"quant_dir": quant_dir, "error": str(exc)},
+            )
+            return None
 
 
 # ----------------------------------------------------------------------
 # Text processing utilities
 # ----------------------------------------------------------------------
 
+# Translate tables that delete one alphabet each; counting is then a pair of
+# C-level passes instead of a per-character Python loop.
+_CYRILLIC_DELETE = {code: None for code in range(0x0410, 0x0450)}
+_CYRILLIC_DELETE.update({ord("ё"): None, ord("Ё"): None})
+_LATIN_DELETE = {code: None for code in range(0x41, 0x5B)}
+_LATIN_DELETE.update({code: None for code in range(0x61, 0x7B)})
+
+if njit is not None:  # pragma: no cover - depends on environment
+
+    @njit(cache=True)
+    def _count_ru_en(codepoints):  # type: ignore[misc]
+        cyr = 0
+        lat = 0
+        for index in range(codepoints.shape[0]):
+            code = codepoints[index]
+            if 0x0410 <= code <= 0x044F or code == 0x0451 or code == 0x0401:
+                cyr += 1
+            elif 0x41 <= code <= 0x5A or 0x61 <= code <= 0x7A:
+                lat += 1
+        return cyr, lat
+
+    # Compile the kernel while the module loads; otherwise the first request
+    # after a cold cache would pay the JIT cost.
+    _count_ru_en(np.zeros(1, dtype=np.uint32))
+
+else:
+    _count_ru_en = None  # type: ignore[assignment]
+
+
+# Counting a prefix of this size is plenty to tell RU from EN apart; it keeps
+# detection O(1) for hour-long transcripts.
+_LANG_DETECT_SAMPLE = 4096
+
+
 def detect_lang_code(text: str) -> str:
     """Rudimentary language detection between RU and EN."""
 
-    cyr = sum("а" <= ch.lower() <= "я" or ch == "ё" for ch in text)
-    lat = sum("a" <= ch.lower() <= "z" for ch in text)
+    if len(text) > _LANG_DETECT_SAMPLE:
+        text = text[:_LANG_DETECT_SAMPLE]
+    if _count_ru_en is not None:
+        codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        cyr, lat = _count_ru_en(codepoints)
+    else:
+        cyr = len(text) - len(text.translate(_CYRILLIC_DELETE))
+        lat = len(text) - len(text.translate(_LATIN_DELETE))
     return "ru" if cyr >= lat else "en"
 
 
@@ -295,16 +815,45 @@ def expand_compounds(sentence: str) -> Iterable[str]:
 
 
 def candidate_actions(text: str) -> List[str]:
+    """Extract normalized action fragments from ``text`` in one scan.
+
+    Sentences and compound fragments are walked via match offsets over the
+    original string instead of the split_sentences/expand_compounds
+    generators, so no intermediate split lists are materialised and
+    separator captures never need filtering out.
+    """
+
     results: List[str] = []
-    for sentence in split_sentences(text):
-        if VERB_RE.search(sentence) is None:
+    stripped = text.strip()
+    length = len(stripped)
+    sentence_start = 0
+    while sentence_start <= length:
+        boundary = SENTENCE_SPLIT_RE.search(stripped, sentence_start)
+        sentence_end = boundary.start() if boundary else length
+        sentence = stripped[sentence_start:sentence_end].strip(" \t-—•")
+        sentence_start = boundary.end() if boundary else length + 1
+        if len(sentence) <= 2 or VERB_RE.search(sentence) is None:
             continue
-        for fragment in expand_compounds(sentence):
-            normalized = re.sub(r"(?i)\b(нужно|надо|будет|давайте|давай|предлагаю|let's|let us)\s+", "", fragment)
+
+        fragment_start = 0
+        sentence_length = len(sentence)
+        while fragment_start <= sentence_length:
+            separator = COMPOUND_SEPARATORS.search(sentence, fragment_start)
+            fragment_end = separator.start() if separator else sentence_length
+            fragment = sentence[fragment_start:fragment_end].strip(" ,.;:—-")
+            fragment_start = separator.end() if separator else sentence_length + 1
+            if not fragment:
+                continue
+            normalized = LEAD_STRIP_RE.sub("", fragment, count=1)
             match = VERB_RE.search(normalized)
             if match:
                 normalized = normalized[match.start() :]
-            normalized = re.split(r"[.;!?]", normalized)[0].strip(" ,.;:—-")
+            end = len(normalized)
+            for terminator in ".;!?":
+                position = normalized.find(terminator, 0, end)
+                if position != -1:
+                    end = position
+            normalized = normalized[:end].strip(" ,.;:—-")
             words = normalized.split()
             if len(words) > MAX_TASK_WORDS:
                 normalized = " ".join(words[:MAX_TASK_WORDS])
@@ -314,9 +863,12 @@ def candidate_actions(text: str) -> List[str]:
 
 
 def clean_candidate(candidate: str) -> str:
-    cleaned = re.sub(r"(?i)^(прошу|нужно|надо|будет|давайте|давай|пожалуйста)\s+", "", candidate)
+    # Both patterns are anchored, so they can match at most once; count=1
+    # lets the engine stop scanning after the match instead of retrying
+    # every remaining position.
+    cleaned = CLEAN_LEAD_RE.sub("", candidate, count=1)
     cleaned = cleaned.strip(" -—•")
-    cleaned = re.sub(r"[\.!\s]+$", "", cleaned)
+    cleaned = TRAIL_PUNCT_RE.sub("", cleaned, count=1)
     if len(cleaned) > MAX_TASK_LENGTH:
         cleaned = cleaned[:MAX_TASK_LENGTH]
     return cleaned
@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
+import multiprocessing
 import os
-import re
 import sys
+from dataclasses import asdict
 from pathlib import Path
 from statistics import mean
 from typing import Iterable
@@ -15,13 +17,28 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 from app.logic import TaskExtractor
+from app.task_types import ActionItem
 
 DATASET_PATH = Path(__file__).with_name("dataset.json")
+PREDICTION_CACHE_PATH = Path(__file__).with_name(".cache") / "predictions.json"
+
+
+class _NormaliseTable(dict):
+    """Translate table that blanks every character outside the kept set."""
+
+    def __missing__(self, codepoint: int) -> str:
+        return " "
+
+
+_NORMALISE_TABLE = _NormaliseTable(
+    {ord(char): char for char in "abcdefghijklmnopqrstuvwxyz0123456789абвгдеёжзийклмнопрстуфхцчшщъыьэюя"}
+)
 
 
 def normalise(text: str) -> str:
-    cleaned = re.sub(r"[^a-z0-9а-яё]+", " ", text.lower())
-    return re.sub(r"\s+", " ", cleaned).strip()
+    # One translate pass plus split/join replaces the two regex
+    # substitutions the metrics run once per compared string.
+    return " ".join(text.lower().translate(_NORMALISE_TABLE).split())
 
 
 def f1(precision: float, recall: float) -> float:
@@ -31,7 +48,10 @@ def f1(precision: float, recall: float) -> float:
 
 
 def evaluate_sample(extractor: TaskExtractor, transcript: str, expected: list[dict[str, object]]) -> dict[str, float]:
-    predicted = extractor.extract_tasks(transcript)
+    return score_sample(extractor.extract_tasks(transcript), expected)
+
+
+def score_sample(predicted: list[ActionItem], expected: list[dict[str, object]]) -> dict[str, float]:
     predicted_map = {normalise(item.summary): item for item in predicted}
     expected_map = {normalise(entry["summary"]) if isinstance(entry.get("summary"), str) else "": entry for entry in expected}
 
@@ -78,6 +98,75 @@ def evaluate_sample(extractor: TaskExtractor, transcript: str, expected: list[di
     }
 
 
+_WORKER_EXTRACTOR: TaskExtractor | None = None
+
+
+def _init_worker() -> None:
+    """Build one extractor per worker process with a small thread pool."""
+
+    global _WORKER_EXTRACTOR
+    # Each worker keeps its intra-op pool small so N processes do not
+    # oversubscribe the cores with N full-size thread pools.
+    os.environ.setdefault("OMP_NUM_THREADS", "2")
+    os.environ.setdefault("TORCH_NUM_THREADS", "2")
+    extractor = TaskExtractor()
+    extractor.startup()
+    _WORKER_EXTRACTOR = extractor
+
+
+def _predict_worker(transcript: str) -> list[dict[str, object]]:
+    if _WORKER_EXTRACTOR is None:  # pragma: no cover - initializer always runs
+        raise RuntimeError("Worker extractor was not initialised")
+    return [asdict(item) for item in _WORKER_EXTRACTOR.extract_tasks(transcript)]
+
+
+def _prediction_cache_key(transcript: str) -> str:
+    """Key predictions by transcript plus the model configuration in effect."""
+
+    material = "\x1f".join(
+        (
+            os.getenv("RU_NLI_MODEL_NAME", ""),
+            os.getenv("RU_NLI_MODEL_DIR", ""),
+            os.getenv("EN_NLI_MODEL_NAME", ""),
+            os.getenv("EN_NLI_MODEL_DIR", ""),
+            os.getenv("MULTI_NLI_MODEL_NAME", ""),
+            os.getenv("MULTI_NLI_MODEL_DIR", ""),
+            os.getenv("NLI_MULTILINGUAL", ""),
+            os.getenv("NLI_DISTILLED", ""),
+            os.getenv("NLI_QUANT_INT8", ""),
+            os.getenv("NLI_DTYPE", ""),
+            os.getenv("NLI_ONNX", ""),
+            os.getenv("NLI_TORCH_COMPILE", ""),
+            os.getenv("NLI_HEURISTIC_SKIP", ""),
+            os.getenv("OPEN_SOURCE_LLM_DISABLED", ""),
+            os.getenv("OPEN_SOURCE_LLM_ID", ""),
+            os.getenv("OPEN_SOURCE_LLM_DIR", ""),
+            os.getenv("OPEN_SOURCE_LLM_TEMPERATURE", ""),
+            os.getenv("OPEN_SOURCE_LLM_MAX_NEW_TOKENS", ""),
+            os.getenv("OPEN_SOURCE_LLM_HEURISTIC_SKIP", ""),
+            transcript,
+        )
+    )
+    return hashlib.blake2b(material.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _load_prediction_cache() -> dict[str, list[dict[str, object]]]:
+    try:
+        return json.loads(PREDICTION_CACHE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_prediction_cache(cache: dict[str, list[dict[str, object]]]) -> None:
+    try:
+        PREDICTION_CACHE_PATH.parent.mkdir(exist_ok=True)
+        PREDICTION_CACHE_PATH.write_text(
+            json.dumps(cache, ensure_ascii=False), encoding="utf-8"
+        )
+    except OSError as exc:  # pragma: no cover - read-only checkouts
+        print(f"Could not persist prediction cache: {exc}", file=sys.stderr)
+
+
 def main() -> None:
     if not DATASET_PATH.exists():
         raise SystemExit(f"Dataset not found: {DATASET_PATH}")
@@ -88,12 +177,43 @@ def main() -> None:
 
     dataset = json.loads(DATASET_PATH.read_text(encoding="utf-8"))
 
-    extractor = TaskExtractor()
-    extractor.startup()
+    # Predictions are persisted between runs so repeated CI invocations on an
+    # unchanged dataset skip model loading entirely. Delete the .cache
+    # directory (or set EVAL_PREDICTION_CACHE=0) to force a fresh run.
+    use_cache = os.getenv("EVAL_PREDICTION_CACHE", "1") == "1"
+    cache = _load_prediction_cache() if use_cache else {}
+    keys = [_prediction_cache_key(sample["transcript"]) for sample in dataset]
+    missing = [index for index, key in enumerate(keys) if key not in cache]
+
+    if missing:
+        transcripts = [dataset[index]["transcript"] for index in missing]
+        # Samples are independent and the models are read-only, so they can
+        # be predicted by a pool of worker processes. EVAL_WORKERS=1 keeps
+        # the old in-process sequential path.
+        workers = int(os.getenv("EVAL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+        workers = min(workers, len(transcripts))
+        if workers > 1:
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(workers, initializer=_init_worker) as pool:
+                predictions = pool.map(_predict_worker, transcripts)
+        else:
+            extractor = TaskExtractor()
+            extractor.startup()
+            predictions = [
+                [asdict(item) for item in extractor.extract_tasks(transcript)]
+                for transcript in transcripts
+            ]
+        for index, predicted in zip(missing, predictions):
+            cache[keys[index]] = predicted
+        if use_cache:
+            _store_prediction_cache(cache)
 
     sample_metrics = [
-        evaluate_sample(extractor, sample["transcript"], sample.get("expected", []))
-        for sample in dataset
+        score_sample(
+            [ActionItem(**entry) for entry in cache[key]],
+            sample.get("expected", []),
+        )
+        for key, sample in zip(keys, dataset)
     ]
 
     def average(metric_name: str) -> float: